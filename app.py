@@ -1,23 +1,81 @@
 from flask import Flask, render_template, request, jsonify
-from dataclasses import dataclass, asdict
+from flask.json.provider import DefaultJSONProvider
+from functools import lru_cache
+from typing import NamedTuple
+import logging
 import os
+import random
+import sys
+import threading
 import time
 
-# Optional OpenAI usage
+logger = logging.getLogger(__name__)
+
+# Optional OpenAI usage (needs openai>=1.17, see requirements.txt)
 USE_OPENAI = False
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+openai_client = None
 if OPENAI_API_KEY:
     try:
+        import httpx
         import openai
-        openai.api_key = OPENAI_API_KEY
+        # One shared client so /chat reuses pooled keep-alive connections
+        openai_client = openai.OpenAI(
+            api_key=OPENAI_API_KEY,
+            max_retries=0,  # retries are handled by openai_chat_completion
+            # DefaultHttpxClient keeps the SDK's transport defaults; only the pool size changes
+            http_client=openai.DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            ),
+        )
         USE_OPENAI = True
     except Exception:
+        logger.exception("OPENAI_API_KEY is set but the OpenAI client could not be created; using local replies")
         USE_OPENAI = False
 
+# Optional orjson for faster JSON responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """用 orjson 處理 JSON 回應與請求解析
+
+    Honours the provider's sort_keys and compact settings; other json.dumps
+    keyword arguments (ensure_ascii, separators, ...) are ignored.
+    """
+    def _options(self, pretty=False):
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def response(self, *args, **kwargs):
+        # Same as DefaultJSONProvider.response, but hands orjson's bytes
+        # straight to the response instead of round-tripping through str
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(
+            obj,
+            default=self.default,
+            option=self._options(pretty) | orjson.OPT_APPEND_NEWLINE,
+        )
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+# Request bodies are small JSON documents; reject anything larger with 413
+app.config["MAX_CONTENT_LENGTH"] = 16 * 1024
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 
-@dataclass
-class Item:
+class Item(NamedTuple):
     name: str
     official_rank: int
     description: str
@@ -40,82 +98,178 @@ OFFICIAL_ITEMS = [
     Item("磁羅盤", 15, "導航（不太有效）"),
 ]
 
-def calculate_score(submitted_names):
-    off_map = {item.name: item.official_rank - 1 for item in OFFICIAL_ITEMS}
-    score = 0
-    for i, name in enumerate(submitted_names):
-        if name in off_map:
-            score += abs(off_map[name] - i)
-        else:
-            score += len(OFFICIAL_ITEMS)
-    return score
+# OFFICIAL_ITEMS is static, so build the lookup tables once at import.
+# Names are interned so lookups with interned keys hit the identity fast path.
+_OFFICIAL_NAMES = tuple(sys.intern(it.name) for it in OFFICIAL_ITEMS)
+_OFF_RANK0 = {name: i for i, name in enumerate(_OFFICIAL_NAMES)}
+_OFFICIAL_NAMES_SET = frozenset(_OFFICIAL_NAMES)
+# Response payload for the static item list
+_OFFICIAL_DICTS = [it._asdict() for it in OFFICIAL_ITEMS]
+
+@lru_cache(maxsize=8)
+def render_index(script_root, openai_enabled):
+    # Apart from OFFICIAL_ITEMS and USE_OPENAI, the page only varies with the
+    # static URLs from url_for, which depend on the request's script root
+    # (e.g. a prefixing reverse proxy), so that is part of the cache key.
+    return render_template("index.html", items=_OFFICIAL_DICTS, openai_enabled=openai_enabled)
 
 @app.route("/")
 def index():
-    items = [asdict(it) for it in OFFICIAL_ITEMS]
-    return render_template("index.html", items=items, openai_enabled=USE_OPENAI)
+    if app.debug:
+        # Skip the cache so template edits show up while developing
+        return render_index.__wrapped__(request.script_root, USE_OPENAI)
+    return render_index(request.script_root, USE_OPENAI)
 
 @app.route("/evaluate", methods=["POST"]) 
 def evaluate():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
     order = data.get("order", [])
     if not isinstance(order, list) or len(order) != len(OFFICIAL_ITEMS):
         return jsonify({"error": "invalid order"}), 400
+    # Must be exactly the official items, each once
+    if not all(isinstance(n, str) for n in order) or set(order) != _OFFICIAL_NAMES_SET:
+        return jsonify({"error": "invalid order"}), 400
+    # Interned names share the objects in _OFF_RANK0, so lookups compare by identity
+    order = list(map(sys.intern, order))
 
-    score = calculate_score(order)
-
-    official_list = [asdict(it) for it in OFFICIAL_ITEMS]
-    submitted_list = [{"name": name, "pos": i + 1} for i, name in enumerate(order)]
-
+    # Score and per-item breakdown in a single pass
+    score = 0
     per_item = []
-    off_pos_map = {it.name: it.official_rank for it in OFFICIAL_ITEMS}
     for i, name in enumerate(order):
+        official = _OFF_RANK0[name]
+        diff = abs(official - i)
+        score += diff
         per_item.append({
             "name": name,
             "submitted_rank": i + 1,
-            "official_rank": off_pos_map.get(name, None),
-            "diff": None if name not in off_pos_map else abs(off_pos_map[name] - (i + 1))
+            "official_rank": official + 1,
+            "diff": diff
         })
 
     return jsonify({
         "score": score,
-        "submitted": submitted_list,
-        "official": official_list,
+        "official": _OFFICIAL_DICTS,
         "per_item": per_item
     })
 
-def local_chat_response(message: str):
-    """簡易本地回應（fallback）：提供有用提示與回覆"""
+# Rule-based hints for the local fallback, keyed by topic
+CHAT_REPLIES = {
+    "oxygen": "氧氣是最關鍵的資源；確保氧氣瓶放在前三名。",
+    "water": "水對倖存很重要，通常排在前二至前三名。",
+    "rank": "你可以把物品拖放後按「評分」，系統會顯示與 NASA 官方排名的差距與分數。",
+}
+# Generic helpful replies, rotated every TIP_WINDOW seconds
+TIP_WINDOW = 10
+CHAT_TIPS = [
+    "試著把維持生命的物品（氧氣、水、食物）放在最前面。",
+    "導航工具對長距離返回基地有幫助，但在短期生存時可能不如氧氣或水重要。",
+    "如果你想要更詳細的解釋，輸入像「為什麼氧氣重要？」之類的問題。"
+]
+
+@lru_cache(maxsize=1024)
+def _classify(message):
+    # Plain substring scans beat a regex here (memchr-fast, no backtracking)
     message_lower = message.lower()
-    # Simple rule-based hints
     if "oxygen" in message_lower or "氧氣" in message_lower:
-        return "氧氣是最關鍵的資源；確保氧氣瓶放在前三名。"
+        return "oxygen"
     if "water" in message_lower or "水" in message_lower:
-        return "水對倖存很重要，通常排在前二至前三名。"
+        return "water"
     if "rank" in message_lower or "排名" in message_lower:
-        return "你可以把物品拖放後按「評分」，系統會顯示與 NASA 官方排名的差距與分數。"
-    # Generic helpful reply
-    tips = [
-        "試著把維持生命的物品（氧氣、水、食物）放在最前面。",
-        "導航工具對長距離返回基地有幫助，但在短期生存時可能不如氧氣或水重要。",
-        "如果你想要更詳細的解釋，輸入像「為什麼氧氣重要？」之類的問題。"
-    ]
+        return "rank"
+    return None
+
+def local_chat_response(message: str):
+    """簡易本地回應（fallback）：提供有用提示與回覆"""
+    category = _classify(message)
+    if category:
+        return CHAT_REPLIES[category]
     # Rotate by time to add a bit variety
-    return tips[int(time.time()) % len(tips)]
+    return CHAT_TIPS[int(time.time()) // TIP_WINDOW % len(CHAT_TIPS)]
+
+# OpenAI call limits: per-attempt timeout, an overall deadline for the call
+# including retries, and a simple circuit breaker that skips OpenAI for a
+# while after repeated consecutive upstream failures (retryable errors and
+# authentication failures, not 4xx replies to a user's request).
+OPENAI_TIMEOUT = 30  # seconds per attempt, well under the deadline so timeouts get retried
+OPENAI_DEADLINE = 120  # seconds for the whole call, retries included
+OPENAI_MAX_ATTEMPTS = 5
+# Above OPENAI_MAX_ATTEMPTS, so a single exhausted request can't open the breaker alone
+BREAKER_THRESHOLD = 2 * OPENAI_MAX_ATTEMPTS
+BREAKER_WINDOW = 60  # seconds
+_breaker = {"failures": 0, "last_failure": 0.0}
+_breaker_lock = threading.Lock()
+# Bulkhead: cap concurrent OpenAI calls so a slow upstream can't tie up every worker
+OPENAI_MAX_CONCURRENT = 20
+_openai_slots = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENT)
+
+def breaker_open():
+    with _breaker_lock:
+        return (
+            _breaker["failures"] >= BREAKER_THRESHOLD
+            and time.time() - _breaker["last_failure"] < BREAKER_WINDOW
+        )
+
+def _record_attempt(ok):
+    with _breaker_lock:
+        if ok:
+            _breaker["failures"] = 0
+        else:
+            _breaker["failures"] += 1
+            _breaker["last_failure"] = time.time()
+
+def openai_chat_completion(client, **kwargs):
+    """呼叫 OpenAI，遇到暫時性錯誤時以遞增間隔（含 jitter）重試，總時間不超過 OPENAI_DEADLINE"""
+    retryable = (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+    deadline = time.monotonic() + OPENAI_DEADLINE
+    for attempt in range(OPENAI_MAX_ATTEMPTS):
+        timeout = min(OPENAI_TIMEOUT, deadline - time.monotonic())
+        try:
+            resp = client.chat.completions.create(timeout=timeout, **kwargs)
+        except retryable:
+            _record_attempt(False)
+            delay = random.uniform(2, 4) * (attempt + 1)
+            # Give up if out of attempts or the next try would start past the deadline
+            if attempt == OPENAI_MAX_ATTEMPTS - 1 or time.monotonic() + delay >= deadline:
+                raise
+            time.sleep(delay)
+        except openai.AuthenticationError:
+            # A bad key affects every request, so let it trip the breaker
+            _record_attempt(False)
+            raise
+        # Other errors (e.g. 400 content-policy rejections) come from the user's
+        # own message and propagate without counting against the breaker.
+        else:
+            _record_attempt(True)
+            return resp
 
 @app.route("/chat", methods=["POST"]) 
 def chat():
-    data = request.get_json()
-    message = data.get("message", "").strip()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    message = data.get("message", "")
+    message = message.strip() if isinstance(message, str) else ""
     if not message:
         return jsonify({"error": "empty message"}), 400
 
     # If OpenAI available, use it
-    if USE_OPENAI:
+    if USE_OPENAI and not breaker_open():
+        if not _openai_slots.acquire(timeout=0.1):
+            # Too many OpenAI calls in flight: answer locally
+            reply = local_chat_response(message)
+            return jsonify({"reply": reply, "source": "local_overload"})
         try:
             # Build a short conversation: system + user
             system = "你是友善的助理，專門提供關於月球倖存任務的實用建議。"
-            resp = openai.ChatCompletion.create(
+            resp = openai_chat_completion(
+                openai_client,
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": system},
@@ -124,12 +278,18 @@ def chat():
                 temperature=0.7,
                 max_tokens=400,
             )
-            text = resp["choices"][0]["message"]["content"].strip()
+            text = resp.choices[0].message.content.strip()
             return jsonify({"reply": text, "source": "openai"})
         except Exception as e:
             # Fallback to local response if OpenAI fails
             fallback = f"（OpenAI 呼叫失敗：{str(e)[:120]}）\n" + local_chat_response(message)
             return jsonify({"reply": fallback, "source": "fallback"})
+        finally:
+            _openai_slots.release()
+    elif USE_OPENAI:
+        # Circuit breaker is open: skip OpenAI until the window passes
+        reply = local_chat_response(message)
+        return jsonify({"reply": reply, "source": "fallback"})
     else:
         # Local rule-based reply
         reply = local_chat_response(message)
@@ -5,12 +5,11 @@ Moon Survival Experiment Task
 玩家需要根據月球生存的優先級來排序物品。
 """
 
-from typing import List, Tuple, Dict
-from dataclasses import dataclass
+import sys
+from typing import List, Tuple, Dict, NamedTuple
 
 
-@dataclass
-class Item:
+class Item(NamedTuple):
     """月球倖存物品"""
     name: str
     official_rank: int  # NASA 專家的排名
@@ -21,7 +20,7 @@ class MoonSurvivalExperiment:
     """月球倖存實驗"""
     
     # NASA 專家的官方排名
-    OFFICIAL_ITEMS = [
+    OFFICIAL_ITEMS = (
         Item("氧氣瓶", 1, "呼吸"),
         Item("水", 2, "補充液體"),
         Item("星圖", 3, "導航"),
@@ -37,26 +36,29 @@ class MoonSurvivalExperiment:
         Item("火柴", 13, "點火"),
         Item("月球地圖", 14, "導航輔助"),
         Item("磁羅盤", 15, "導航（不太有效）"),
-    ]
+    )
     
     def __init__(self):
         """初始化實驗"""
-        self.items = self.OFFICIAL_ITEMS.copy()
         self.team_ranking: List[Item] = []
         self.individual_rankings: Dict[str, List[Item]] = {}
     
     def display_items(self) -> None:
         """顯示所有物品"""
-        print("=" * 60)
-        print("月球倖存實驗 - 物品列表")
-        print("=" * 60)
-        print("\n你被困在月球上，距離基地 200 英里。")
-        print("你的太空船損壞了。")
-        print("請根據倖存重要性排序以下 15 項物品（最重要到最不重要）:\n")
-        
-        for i, item in enumerate(self.items, 1):
-            print(f"{i:2d}. {item.name:20s} - {item.description}")
-        print()
+        lines = [
+            "=" * 60,
+            "月球倖存實驗 - 物品列表",
+            "=" * 60,
+            "\n你被困在月球上，距離基地 200 英里。",
+            "你的太空船損壞了。",
+            "請根據倖存重要性排序以下 15 項物品（最重要到最不重要）:\n",
+        ]
+        lines += [
+            f"{i:2d}. {item.name:20s} - {item.description}"
+            for i, item in enumerate(self.OFFICIAL_ITEMS, 1)
+        ]
+        lines.append("")
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def get_individual_ranking(self, person_name: str) -> None:
         """獲取個人排名"""
@@ -69,15 +71,15 @@ class MoonSurvivalExperiment:
                 indices = [int(x.strip()) - 1 for x in ranking_input.split(",")]
                 
                 # 驗證輸入
-                if len(indices) != len(self.items):
-                    print(f"❌ 錯誤: 請輸入 {len(self.items)} 個物品")
+                if len(indices) != len(self.OFFICIAL_ITEMS):
+                    print(f"❌ 錯誤: 請輸入 {len(self.OFFICIAL_ITEMS)} 個物品")
                     continue
                 
-                if sorted(indices) != list(range(len(self.items))):
+                if sorted(indices) != list(range(len(self.OFFICIAL_ITEMS))):
                     print("❌ 錯誤: 每個物品必須恰好出現一次")
                     continue
                 
-                self.individual_rankings[person_name] = [self.items[i] for i in indices]
+                self.individual_rankings[person_name] = [self.OFFICIAL_ITEMS[i] for i in indices]
                 print("✅ 排序已保存\n")
                 break
                 
@@ -90,65 +92,64 @@ class MoonSurvivalExperiment:
             print("❌ 沒有個人排名資料")
             return
         
+        # 每個人的 {物品名稱: 排名} 對照表，避免逐項線性搜尋
+        per_person_rank = [
+            {x.name: i for i, x in enumerate(person_ranking, 1)}
+            for person_ranking in self.individual_rankings.values()
+        ]
+        
         # 計算每項物品的平均排名
         item_scores = {}
-        for item in self.items:
-            scores = []
-            for person_ranking in self.individual_rankings.values():
-                rank = next((i + 1 for i, x in enumerate(person_ranking) if x.name == item.name), 0)
-                scores.append(rank)
+        for item in self.OFFICIAL_ITEMS:
+            scores = [ranks.get(item.name, 0) for ranks in per_person_rank]
             item_scores[item.name] = sum(scores) / len(scores)
         
         # 按平均排名排序
         self.team_ranking = sorted(
-            self.items,
+            self.OFFICIAL_ITEMS,
             key=lambda item: item_scores[item.name]
         )
     
     def display_results(self) -> None:
         """顯示結果比較"""
-        print("\n" + "=" * 80)
-        print("結果比較")
-        print("=" * 80)
+        lines = ["\n" + "=" * 80, "結果比較", "=" * 80]
         
         # 顯示團隊排名
-        print("\n【團隊排名（平均）】")
-        print("-" * 80)
-        for rank, item in enumerate(self.team_ranking, 1):
-            print(f"{rank:2d}. {item.name:20s}")
+        lines += ["\n【團隊排名（平均）】", "-" * 80]
+        lines += [
+            f"{rank:2d}. {item.name:20s}"
+            for rank, item in enumerate(self.team_ranking, 1)
+        ]
         
         # 顯示官方排名
-        print("\n【NASA 官方排名】")
-        print("-" * 80)
-        for item in self.OFFICIAL_ITEMS:
-            print(f"{item.official_rank:2d}. {item.name:20s}")
+        lines += ["\n【NASA 官方排名】", "-" * 80]
+        lines += [
+            f"{item.official_rank:2d}. {item.name:20s}"
+            for item in self.OFFICIAL_ITEMS
+        ]
         
         # 計算準確度
-        print("\n" + "=" * 80)
-        print("準確度分析")
-        print("=" * 80)
+        lines += ["\n" + "=" * 80, "準確度分析", "=" * 80]
         
         team_score = self.calculate_accuracy(self.team_ranking)
         
-        print(f"\n團隊總分: {team_score}")
-        print(f"最佳可能分數: 0")
-        print(f"最差可能分數: {sum(range(len(self.items)))}")
+        lines += [
+            f"\n團隊總分: {team_score}",
+            "最佳可能分數: 0",
+            f"最差可能分數: {sum(range(len(self.OFFICIAL_ITEMS)))}",
+        ]
         
         # 個人準確度
-        print("\n【個人準確度】")
-        print("-" * 80)
-        for person_name, ranking in self.individual_rankings.items():
-            score = self.calculate_accuracy(ranking)
-            print(f"{person_name:20s}: {score:4d} 分")
+        lines += ["\n【個人準確度】", "-" * 80]
+        lines += [
+            f"{person_name:20s}: {self.calculate_accuracy(ranking):4d} 分"
+            for person_name, ranking in self.individual_rankings.items()
+        ]
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def calculate_accuracy(self, ranking: List[Item]) -> int:
         """計算與官方排名的差異（絕對誤差總和）"""
-        score = 0
-        for i, item in enumerate(ranking):
-            official_rank = item.official_rank - 1
-            team_rank = i
-            score += abs(official_rank - team_rank)
-        return score
+        return sum(abs(item.official_rank - 1 - i) for i, item in enumerate(ranking))
     
     def run_single_mode(self) -> None:
         """單人模式"""
@@ -157,22 +158,19 @@ class MoonSurvivalExperiment:
         self.calculate_team_ranking()
         
         # 顯示玩家排名 vs 官方排名
-        print("\n" + "=" * 80)
-        print("結果")
-        print("=" * 80)
+        lines = ["\n" + "=" * 80, "結果", "=" * 80]
         
         player_ranking = self.individual_rankings["玩家"]
         score = self.calculate_accuracy(player_ranking)
         
-        print("\n【你的排名】")
+        lines.append("\n【你的排名】")
         for rank, item in enumerate(player_ranking, 1):
             official = item.official_rank
-            diff = rank - official
-            symbol = "✓" if diff == 0 else "✗"
-            print(f"{symbol} {rank:2d}. {item.name:20s} (官方排名: {official:2d})")
+            symbol = "✓" if rank == official else "✗"
+            lines.append(f"{symbol} {rank:2d}. {item.name:20s} (官方排名: {official:2d})")
         
-        print(f"\n準確度分數: {score}")
-        print(f"分數越低越好 (最佳: 0)")
+        lines += [f"\n準確度分數: {score}", "分數越低越好 (最佳: 0)"]
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def run_team_mode(self) -> None:
         """團隊模式"""